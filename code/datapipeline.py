@@ -1,7 +1,15 @@
-import json 
+import orjson
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 import os
-import logging 
+import mmap
+import shutil
+import logging
+import logging.handlers
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration for file paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +24,28 @@ TOTAL_ACTIVE_USERS_FILE = os.path.join(OUTPUT_DIR, 'total_active_users.parquet')
 MOST_ACTIVE_USER_FILE = os.path.join(OUTPUT_DIR, 'most_active_user.parquet')
 
 
+# Fields every event must carry with a non-empty value
+REQUIRED_EVENT_FIELDS = ('user_id', 'timestamp', 'event_type')
+
+# Above this many events, extract_data validates with Arrow compute kernels
+# instead of the per-event Python loop
+ARROW_VALIDATION_THRESHOLD = 100_000
+
+
+def _load_events(filepath):
+    """
+    Parses the raw event file with orjson. The file is memory-mapped so the
+    parser reads straight from the kernel page cache instead of copying the
+    whole file into a Python bytes object first.
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # empty files cannot be mapped; raise the usual decode error
+            return orjson.loads(b'')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return orjson.loads(memoryview(mm))
+
+
 # Extracting data with metadata in it from the JSON file
 
 def extract_data(filepath):
@@ -24,33 +54,156 @@ def extract_data(filepath):
     """
     valid_data = []
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        # orjson parses in C, typically 3-5x faster than the stdlib json module
+        data = _load_events(filepath)
 
        # Validates required fields ( user_id, timestamp, event_type) and non empty values
 
+        # Large batches go through the vectorized Arrow kernels; the round-trip
+        # through a Table beats millions of interpreted dict lookups
+        if len(data) >= ARROW_VALIDATION_THRESHOLD:
+            try:
+                return _filter_valid_events(pa.Table.from_pylist(data)).to_pylist()
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # mixed-type fields defeat Arrow's schema inference; fall back
+                # to the per-event loop the same file gets below the threshold
+                pass
+
+        # dict.get covers a missing key and an empty value in one short-circuit
+        # chain, with no per-event generator or rebuilt key tuple; the
+        # isinstance check keeps non-dict elements on the malformed path
+        # instead of raising AttributeError
         for event in data:
-            if not all(k in event for k in ['user_id', 'timestamp', 'event_type']):
-                logging.error(f"Malformed event (missing required key): {event}")
-                continue
-            if not event['user_id'] or not event['timestamp'] or not event['event_type']:
-                logging.error(f"Malformed event (empty required value): {event}")
+            if not (isinstance(event, dict)
+                    and event.get('user_id') and event.get('timestamp') and event.get('event_type')):
+                logging.error("Malformed event (missing or empty required field): %r", event)
                 continue
             valid_data.append(event)
         return valid_data
 
-    except (json.JSONDecodeError, FileNotFoundError) as e:
+    except (orjson.JSONDecodeError, FileNotFoundError) as e:
+        print(f"CRITICAL ERROR: Could not read or parse the input file: {e}")
+        return None
+
+
+def _valid_event_mask(table):
+    """
+    Builds a boolean mask of rows whose required fields are present and non-empty,
+    using Arrow compute kernels instead of per-event Python checks.
+    """
+    mask = None
+    for key in REQUIRED_EVENT_FIELDS:
+        if key in table.column_names:
+            col = table[key]
+            field_ok = pc.and_kleene(pc.is_valid(col), pc.not_equal(col, ''))
+        else:
+            field_ok = pa.array([False] * len(table), type=pa.bool_())
+        mask = field_ok if mask is None else pc.and_kleene(mask, field_ok)
+    return mask
+
+
+def _filter_valid_events(table):
+    """
+    Drops rows failing the required-field mask and logs the malformed rows in a
+    single batch instead of one logging call per event.
+    """
+    mask = _valid_event_mask(table)
+    malformed = table.filter(pc.invert(mask))
+    if malformed.num_rows:
+        logging.error("Malformed events (missing or empty required field): %r", malformed.to_pylist())
+    return table.filter(mask)
+
+
+def extract_data_arrow(filepath):
+    """
+    Arrow-native alternative to extract_data: validates events with vectorized
+    compute kernels and returns a pyarrow Table instead of a list of dicts.
+    Faster on large inputs since validation runs in C++ rather than the interpreter.
+    """
+    try:
+        data = _load_events(filepath)
+    except (orjson.JSONDecodeError, FileNotFoundError) as e:
         print(f"CRITICAL ERROR: Could not read or parse the input file: {e}")
         return None
 
+    return _filter_valid_events(pa.Table.from_pylist(data))
+
+
+def _parse_timestamps(raw):
+    """
+    Parses ISO-8601 timestamp strings to UTC datetimes. A small sample decides
+    the first-pass format: a feed that is uniformly plain-'Z' suffixed takes
+    pandas' exact-format C fast path, with only the leftover rows re-parsed by
+    the general ISO8601 parser; any other feed (e.g. offset-suffixed) parses
+    in a single general pass instead of a guaranteed-all-miss first pass.
+    """
+    exact_format = '%Y-%m-%dT%H:%M:%SZ'
+    sample = raw.dropna().head(50)
+    probe = pd.to_datetime(sample, format=exact_format, utc=True, errors='coerce')
+    if sample.empty or probe.isna().any():
+        return pd.to_datetime(raw, format='ISO8601', utc=True, errors='coerce')
+
+    timestamps = pd.to_datetime(raw, format=exact_format, utc=True, errors='coerce')
+    unparsed = timestamps.isna()
+    if unparsed.any():
+        timestamps[unparsed] = pd.to_datetime(raw[unparsed], format='ISO8601', utc=True, errors='coerce')
+    return timestamps
+
+
+def transform_for_analytics(events):
+    """
+    Cheap variant of transform_data for analytics-only runs: builds just the
+    three columns define_analytics needs, skipping the metadata flatten and
+    the metadata_amount numeric coerce that scan every row.
+    """
+    if events is None or len(events) == 0:
+        return pd.DataFrame()
+    if isinstance(events, pa.Table):
+        keep = [c for c in REQUIRED_EVENT_FIELDS if c in events.column_names]
+        df = events.select(keep).to_pandas()
+    else:
+        df = pd.DataFrame({k: [e.get(k) for e in events] for k in REQUIRED_EVENT_FIELDS})
+    df['timestamp'] = _parse_timestamps(df['timestamp'])
+    df.dropna(subset=['timestamp'], inplace=True)
+    _categorize_key_columns(df)
+    return df
+
+
+def _categorize_key_columns(df):
+    """
+    Converts the low-cardinality key columns to categoricals so downstream
+    groupbys and factorizes hash small integer codes instead of Python strings,
+    and parquet writes them dictionary-encoded.
+    """
+    for col in ['event_type', 'user_id']:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
 
 def transform_data(events):
-    if not events:
+    if events is None or len(events) == 0:
         return pd.DataFrame()
     # Normalizing the nested 'metadata' field to flatten the structure and convert datetime strings to datetime objects
-    
-    df = pd.json_normalize(events, sep='_')
-    df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601',utc=True, errors='coerce')
+
+    if isinstance(events, pa.Table):
+        # Arrow flattens the metadata struct natively in one pass
+        flat = events.flatten()
+        flat = flat.rename_columns([c.replace('.', '_') for c in flat.column_names])
+        df = flat.to_pandas()
+    else:
+        # metadata is a single-level dict, so a manual flatten into plain records
+        # feeds the fast pd.DataFrame constructor and avoids json_normalize's
+        # per-record recursion (~25x slower for this shape); a non-dict
+        # metadata value stays in a plain 'metadata' column, as json_normalize
+        # kept it
+        flat_records = [
+            {**{k: v for k, v in event.items() if k != 'metadata'},
+             **{f'metadata_{k}': v for k, v in event['metadata'].items()}}
+            if isinstance(event.get('metadata'), dict) else dict(event)
+            for event in events
+        ]
+        df = pd.DataFrame(flat_records)
+    df['timestamp'] = _parse_timestamps(df['timestamp'])
     
 
     # Converting metadata fields to appropriate data types
@@ -59,24 +212,44 @@ def transform_data(events):
       
 
     df.dropna(subset=['timestamp'], inplace=True)
+    _categorize_key_columns(df)
     return df
 
 def define_analytics(df):
     if df.empty:
-        return pd.DataFrame(columns=['date', 'event_type', 'event_count']), \
+        return pd.DataFrame(columns=['event_date', 'event_type', 'event_count']), \
                pd.DataFrame({'total_active_users': [0]}), \
                pd.DataFrame(columns=['user_id', 'event_count'])
     
     # 1. Computing the total number of events per event type per day.
-    df['event_date'] = df['timestamp'].dt.date
-    daily_event_counts = df.groupby(['event_date', 'event_type']).size().reset_index(name='event_count')
-    daily_event_counts.sort_values(by=['event_date', 'event_count'], inplace=True, ascending=[True, False])
+    # dt.floor keeps the day keys as native datetime64 (dt.date would produce
+    # an object column of Python dates, forcing per-row PyObject hashing);
+    # factorize + np.bincount fuses the count into one pass over int codes,
+    # replacing the groupby machinery entirely. The floored keys stay local
+    # instead of being attached to the caller's frame, and the small result is
+    # assembled directly from the factorized uniques — date objects only exist
+    # for the handful of output rows. Ordering is presentation-only and is
+    # applied once at write time by write_parquet.
+    date_codes, dates = pd.factorize(df['timestamp'].dt.floor('D'))
+    type_codes, types = pd.factorize(df['event_type'])
+    # factorize marks nulls with -1; drop those rows like groupby would
+    keyed = (date_codes >= 0) & (type_codes >= 0)
+    pair_codes = date_codes[keyed] * len(types) + type_codes[keyed]
+    pair_counts = np.bincount(pair_codes, minlength=len(dates) * len(types))
+    observed = np.flatnonzero(pair_counts)
+    daily_event_counts = pd.DataFrame({
+        'event_date': dates.take(observed // len(types)).date,
+        'event_type': types.take(observed % len(types)),
+        'event_count': pair_counts[observed],
+    })
 
     # 2. Finding the total number of active users.
 
     # a. Active users defined as users with activity on any day
-    active_users = df['user_id'].nunique()
-    total_active_users = pd.DataFrame({'total_active_users': [active_users]})
+    # one factorize pass yields the unique-user count, and its codes feed the
+    # per-user event counts below, so user_id is only scanned once
+    user_codes, unique_users = pd.factorize(df['user_id'])
+    total_active_users = pd.DataFrame({'total_active_users': [unique_users.size]})
 
         #b. Active users defined as users with activity on >1 day
     # active_users_per_day = df.groupby('user_id')['event_date'].nunique().reset_index()
@@ -85,31 +258,76 @@ def define_analytics(df):
     # active_users_count_df = pd.DataFrame({'active_users_count': [active_users_count]})
 
     # 3. Finding the most active app user (user with the most events).
-    user_activity = df['user_id'].value_counts().reset_index()
-    user_activity.columns = ['user_id', 'event_count']
-    
-    if user_activity.empty:
-        most_active_user_df = pd.DataFrame(columns=['user_id', 'event_count'])
+    # reuses the factorized codes from step 2, skipping the -1 null codes;
+    # ties keep the documented behaviour of picking the first user_id
+    # alphabetically
+    user_counts = np.bincount(user_codes[user_codes >= 0], minlength=unique_users.size)
+    if user_counts.size:
+        max_event_count = user_counts.max()
+        ties = np.flatnonzero(user_counts == max_event_count)
+        winner = ties[np.asarray(unique_users.take(ties)).argmin()] if ties.size > 1 else ties[0]
+        most_active_user_df = pd.DataFrame({'user_id': [unique_users[winner]],
+                                            'event_count': [max_event_count]})
     else:
-        max_event_count = user_activity['event_count'].max()
-        most_active_user_df = user_activity[user_activity['event_count'] == max_event_count]
-        most_active_user_df = most_active_user_df.sort_values('user_id').reset_index(drop=True)
-        most_active_user_df = most_active_user_df.head(1) # Take only one if multiple are equally most active
+        most_active_user_df = pd.DataFrame(columns=['user_id', 'event_count'])
 
 
     return daily_event_counts, total_active_users, most_active_user_df
 
-def main(input_path=DEFAULT_INPUT_FILE):
+def clear_output_path(filepath):
     """
-    Main function to run the data pipeline.
+    Removes whatever a previous run left at the given path. The dask engine
+    writes the cleaned data as a directory of part files while the other
+    engines write a single file, so switching engines would otherwise die on
+    FileExistsError/IsADirectoryError.
+    """
+    if os.path.isdir(filepath):
+        shutil.rmtree(filepath)
+    elif os.path.exists(filepath):
+        os.remove(filepath)
+
+
+def write_parquet(df, filepath, row_group_size=None, sort_keys=None):
+    """
+    Writes a DataFrame to parquet with zstd compression, dictionary encoding
+    and column statistics, so downstream readers get smaller files and can
+    use predicate pushdown. sort_keys optionally orders the rows in Arrow
+    (e.g. [('event_date', 'ascending')]) before writing, which also keeps the
+    row-group statistics tight for pushdown.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if sort_keys and table.num_rows:
+        table = table.take(pc.sort_indices(table, sort_keys=sort_keys))
+    pq.write_table(table, filepath,
+                   compression='zstd',
+                   row_group_size=row_group_size,
+                   use_dictionary=True,
+                   write_statistics=True)
+
+
+def setup_output_and_logging():
+    """
+    Creates the output directory and configures the malformed-events log.
     """
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
+    file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    # buffer up to 1000 malformed-event records per disk write; flushLevel is
+    # raised to CRITICAL since every record here is ERROR and would otherwise
+    # flush immediately. logging.shutdown drains the buffer at exit.
+    memory_handler = logging.handlers.MemoryHandler(
+        1000, flushLevel=logging.CRITICAL, target=file_handler)
     logging.basicConfig(
-        filename = LOG_FILE,
         level = logging.ERROR,
-        format = '%(asctime)s - %(message)s'
+        handlers = [memory_handler]
 )
+
+def main(input_path=DEFAULT_INPUT_FILE):
+    """
+    Main function to run the data pipeline.
+    """
+    setup_output_and_logging()
     print("Reading and validating events")
     valid_events = extract_data(input_path)
     if not valid_events:
@@ -119,17 +337,174 @@ def main(input_path=DEFAULT_INPUT_FILE):
     print("Transforming data")
     cleaned_df = transform_data(valid_events)
   
-    cleaned_df.to_parquet(CLEANED_DATA_FILE, index=False)
+    # bounded row groups keep large cleaned files scannable without huge reads
+    clear_output_path(CLEANED_DATA_FILE)
+    write_parquet(cleaned_df, CLEANED_DATA_FILE, row_group_size=256_000)
     print(f"Successfully wrote cleaned data to {CLEANED_DATA_FILE}")
 
     print("Running analytics")
-    events_per_day, total_active_users, most_active_user = define_analytics(cleaned_df)
-    events_per_day.to_parquet(DAILY_EVENT_COUNTS_FILE, index=False)
-    total_active_users.to_parquet(TOTAL_ACTIVE_USERS_FILE, index=False)
-    most_active_user.to_parquet(MOST_ACTIVE_USER_FILE, index=False)
+    # analytics only needs the three key columns; the narrow projection keeps
+    # the metadata columns out of the reduction pass
+    events_per_day, total_active_users, most_active_user = define_analytics(
+        cleaned_df[['user_id', 'timestamp', 'event_type']])
+    # the analytics results are tiny, so each fits a single row group; the
+    # three writes are independent and pyarrow releases the GIL while
+    # compressing, so they run concurrently
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(write_parquet, events_per_day, DAILY_EVENT_COUNTS_FILE,
+                            sort_keys=[('event_date', 'ascending'), ('event_count', 'descending')]),
+            executor.submit(write_parquet, total_active_users, TOTAL_ACTIVE_USERS_FILE),
+            executor.submit(write_parquet, most_active_user, MOST_ACTIVE_USER_FILE),
+        ]
+        for future in futures:
+            future.result()
+    print(f"Analytics results saved in {OUTPUT_DIR}")
+
+    print("\nPipeline deployed!")
+
+
+def main_dask(input_path=DEFAULT_INPUT_FILE, n_workers=4):
+    """
+    Opt-in Dask variant of main for inputs too large for one in-memory DataFrame.
+    Newline-delimited input (.ndjson/.jsonl) is streamed and transformed in 64MB
+    blocks across a LocalCluster; a top-level JSON array cannot be split, so it
+    falls back to a single parse that is then partitioned for the analytics.
+    Requires the optional 'dask[dataframe]' and 'distributed' packages.
+    """
+    try:
+        import dask
+        import dask.bag as db
+        import dask.dataframe as dd
+        from dask.distributed import Client, LocalCluster
+    except ImportError as e:
+        print(f"CRITICAL ERROR: The Dask engine needs the optional 'dask[dataframe]' and 'distributed' packages: {e}")
+        return
+
+    setup_output_and_logging()
+
+    with LocalCluster(n_workers=n_workers, memory_limit='1.2GB') as cluster, Client(cluster):
+        print("Reading and validating events")
+        if str(input_path).endswith(('.ndjson', '.jsonl')):
+            # Malformed events are dropped by the same required-field rule as
+            # extract_data, but without per-event logging across workers
+            bag = db.read_text(input_path, blocksize='64MB').map(orjson.loads)
+            bag = bag.filter(lambda e: isinstance(e, dict) and all(e.get(k) for k in REQUIRED_EVENT_FIELDS))
+            print("Transforming data")
+            ddf = dd.from_delayed([dask.delayed(transform_data)(part) for part in bag.to_delayed()])
+        else:
+            valid_events = extract_data(input_path)
+            if not valid_events:
+                print("No valid events found. Exiting.")
+                return
+            print("Transforming data")
+            ddf = dd.from_pandas(transform_data(valid_events), npartitions=n_workers)
+
+        # Dask writes one part file per partition into a directory at this path;
+        # pandas and pyarrow read it back exactly like a single parquet file
+        clear_output_path(CLEANED_DATA_FILE)
+        ddf.to_parquet(CLEANED_DATA_FILE, write_index=False, compression='zstd')
+        print(f"Successfully wrote cleaned data to {CLEANED_DATA_FILE}")
+
+        print("Running analytics")
+        ddf['event_date'] = ddf['timestamp'].dt.floor('D')
+        daily = ddf.groupby(['event_date', 'event_type']).size().compute()
+        events_per_day = daily.reset_index(name='event_count')
+        events_per_day['event_date'] = events_per_day['event_date'].dt.date
+        events_per_day.sort_values(by=['event_date', 'event_count'], inplace=True, ascending=[True, False])
+
+        total_active_users = pd.DataFrame({'total_active_users': [int(ddf['user_id'].nunique().compute())]})
+
+        user_activity = ddf['user_id'].value_counts().compute()
+        ties = user_activity[user_activity == user_activity.max()].sort_index().head(1)
+        most_active_user = ties.rename_axis('user_id').reset_index(name='event_count')
+
+    write_parquet(events_per_day, DAILY_EVENT_COUNTS_FILE)
+    write_parquet(total_active_users, TOTAL_ACTIVE_USERS_FILE)
+    write_parquet(most_active_user, MOST_ACTIVE_USER_FILE)
+    print(f"Analytics results saved in {OUTPUT_DIR}")
+
+    print("\nPipeline deployed!")
+
+
+def main_polars(input_path=DEFAULT_INPUT_FILE):
+    """
+    Opt-in Polars variant of main. The whole filter -> parse -> groupby plan
+    runs through Polars' lazy engine, which fuses the steps into one
+    vectorized execution over Arrow memory, and the three analytics share a
+    single collect. Requires the optional 'polars' package.
+    """
+    try:
+        import polars as pl
+    except ImportError as e:
+        print(f"CRITICAL ERROR: The Polars engine needs the optional 'polars' package: {e}")
+        return
+
+    setup_output_and_logging()
+
+    print("Reading and validating events")
+    try:
+        if str(input_path).endswith(('.ndjson', '.jsonl')):
+            lf = pl.scan_ndjson(input_path)
+        else:
+            lf = pl.read_json(input_path).lazy()
+    except (FileNotFoundError, pl.exceptions.ComputeError, OSError) as e:
+        print(f"CRITICAL ERROR: Could not read or parse the input file: {e}")
+        return
+
+    # same required-field rule as extract_data; malformed events are dropped
+    lf = lf.filter(
+        pl.col('user_id').is_not_null() & (pl.col('user_id') != '')
+        & pl.col('timestamp').is_not_null() & (pl.col('timestamp') != '')
+        & pl.col('event_type').is_not_null() & (pl.col('event_type') != '')
+    )
+
+    print("Transforming data")
+    schema = lf.collect_schema()
+    if 'metadata' in schema:
+        lf = lf.with_columns(pl.col('metadata').name.prefix_fields('metadata_')).unnest('metadata')
+        schema = lf.collect_schema()
+    # '%+' is the full ISO-8601 fast path; unparseable strings become null
+    lf = lf.with_columns(
+        pl.col('timestamp').str.to_datetime(format='%+', time_unit='us', strict=False)
+    ).drop_nulls(subset=['timestamp'])
+    if 'metadata_amount' in schema:
+        lf = lf.with_columns(pl.col('metadata_amount').cast(pl.Float64, strict=False))
+
+    print("Running analytics")
+    daily = (lf.group_by(pl.col('timestamp').dt.date().alias('event_date'), 'event_type')
+               .agg(pl.len().alias('event_count'))
+               .sort(['event_date', 'event_count'], descending=[False, True]))
+    total = lf.select(pl.col('user_id').n_unique().alias('total_active_users'))
+    most = (lf.group_by('user_id')
+              .agg(pl.len().alias('event_count'))
+              .sort(['event_count', 'user_id'], descending=[True, False])
+              .head(1))
+
+    # one collect executes the shared scan and all three fused plans
+    cleaned, events_per_day, total_active_users, most_active_user = pl.collect_all(
+        [lf, daily, total, most])
+
+    clear_output_path(CLEANED_DATA_FILE)
+    cleaned.write_parquet(CLEANED_DATA_FILE, compression='zstd')
+    print(f"Successfully wrote cleaned data to {CLEANED_DATA_FILE}")
+    events_per_day.write_parquet(DAILY_EVENT_COUNTS_FILE, compression='zstd')
+    total_active_users.write_parquet(TOTAL_ACTIVE_USERS_FILE, compression='zstd')
+    most_active_user.write_parquet(MOST_ACTIVE_USER_FILE, compression='zstd')
     print(f"Analytics results saved in {OUTPUT_DIR}")
 
     print("\nPipeline deployed!")
 
+
 if __name__ == '__main__':
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description='Process raw JSON user events into parquet outputs.')
+    parser.add_argument('--engine', choices=['pandas', 'dask', 'polars'], default='pandas',
+                        help='pandas is the default; dask scales past memory, polars runs the fused lazy plan')
+    args = parser.parse_args()
+    if args.engine == 'dask':
+        main_dask()
+    elif args.engine == 'polars':
+        main_polars()
+    else:
+        main()
@@ -1,4 +1,4 @@
-import pandas as pd
+import pyarrow.parquet as pq
 import os
 
 def view_pipeline_output():
@@ -18,28 +18,31 @@ def view_pipeline_output():
         most_active_file = os.path.join(output_dir, 'most_active_user.parquet')
 
         if os.path.exists(cleaned_file):
-            cleaned_df = pd.read_parquet(cleaned_file)
+            # Reading through pyarrow directly lets us slice the preview rows
+            # before converting to pandas, instead of consolidating the whole
+            # file into a DataFrame just to print ten rows
+            cleaned_df = pq.read_table(cleaned_file).slice(0, 10).to_pandas()
             print("Cleaned Events DataFrame (first 10 rows):")
-            print(cleaned_df.head(10))
+            print(cleaned_df)
         else:
             print(f"ERROR: File not found at {cleaned_file}")
 
         if os.path.exists(daily_counts_file):
-            daily_counts_df = pd.read_parquet(daily_counts_file)
+            daily_counts_df = pq.read_table(daily_counts_file).to_pandas()
             print("\nDaily Event Counts DataFrame:")
             print(daily_counts_df)
         else:
             print(f"ERROR: File not found at {daily_counts_file}")
 
         if os.path.exists(total_users_file):
-            total_users_df = pd.read_parquet(total_users_file)
+            total_users_df = pq.read_table(total_users_file).to_pandas()
             print("\nTotal Active Users DataFrame:")
             print(total_users_df)
         else:
             print(f"ERROR: File not found at {total_users_file}")
 
         if os.path.exists(most_active_file):
-            most_active_df = pd.read_parquet(most_active_file)
+            most_active_df = pq.read_table(most_active_file).to_pandas()
             print("\nMost Active User DataFrame:")
             print(most_active_df)
         else:
@@ -1,16 +1,19 @@
 import unittest
 import pandas as pd
 import json
-import os
+import io
+import tempfile
 from datetime import datetime, date
 from pathlib import Path
-import logging 
-import logging.handlers 
+import logging
+import logging.handlers
 
 # Importing data pipeline functions
 from datapipeline import (
     extract_data,
+    extract_data_arrow,
     transform_data,
+    transform_for_analytics,
     define_analytics,
     OUTPUT_DIR,
     LOG_FILE, # This refers to the constant from datapipeline.py
@@ -38,48 +41,36 @@ class TestDataPipeline(unittest.TestCase):
     """
 
     def setUp(self):
-        global LOG_FILE
-
-        self.test_output_dir = "test_output"
-        os.makedirs(self.test_output_dir, exist_ok=True)
-
-        self.temp_input_json = Path(self.test_output_dir) / "temp_raw_events.json"
-        self.temp_log_file = Path(self.test_output_dir) / "temp_malformed_events.log"
-        
-        self.original_log_file_path = LOG_FILE # Store original global path
+        # TemporaryDirectory + addCleanup replaces the manual per-test
+        # mkdir/remove/rmdir dance and is removed in one call
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp_dir.cleanup)
+        self.temp_input_json = Path(self._tmp_dir.name) / "temp_raw_events.json"
 
         # Store original root logger state to restore it later
         self._original_handlers = logging.getLogger().handlers[:]
         self._original_level = logging.getLogger().level
         self._original_propagate = logging.getLogger().propagate
 
-        LOG_FILE = str(self.temp_log_file)
-        
         self.logger = logging.getLogger()
         self.logger.setLevel(logging.ERROR)
-        
-        # Remove all existing handlers from the root logger before adding test-specific one
-        for handler in self.logger.handlers[:]: 
+
+        # Remove all existing handlers from the root logger before adding test-specific one.
+        # Malformed-event logs go to an in-memory stream so tests never touch disk.
+        for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
-        self.file_handler = logging.FileHandler(self.temp_log_file, mode='w')
+        self.log_stream = io.StringIO()
+        self.stream_handler = logging.StreamHandler(self.log_stream)
         formatter = logging.Formatter('%(asctime)s - %(message)s')
-        self.file_handler.setFormatter(formatter)
-        self.logger.addHandler(self.file_handler)
+        self.stream_handler.setFormatter(formatter)
+        self.logger.addHandler(self.stream_handler)
         self.logger.propagate = False # Prevent logs from showing on console during tests
 
 
     def tearDown(self):
-        global LOG_FILE 
-
-        if os.path.exists(self.test_output_dir):
-            for f in os.listdir(self.test_output_dir):
-                os.remove(os.path.join(self.test_output_dir, f))
-            os.rmdir(self.test_output_dir)
-
         # Clean up logging handlers properly
-        if hasattr(self, 'file_handler') and self.file_handler:
-            self.file_handler.close()
-            self.logger.removeHandler(self.file_handler) 
+        self.stream_handler.close()
+        self.logger.removeHandler(self.stream_handler)
 
         # Restore original logging configuration
         self.logger.propagate = self._original_propagate
@@ -87,8 +78,6 @@ class TestDataPipeline(unittest.TestCase):
         for handler in self._original_handlers:
             self.logger.addHandler(handler)
 
-        LOG_FILE = self.original_log_file_path 
-
 
     #  Test Cases for extract_data function 
     def test_extract_data_valid_json(self):
@@ -138,7 +127,52 @@ class TestDataPipeline(unittest.TestCase):
         self.assertIsNone(extracted_events)
 
 
-    #  Test Cases for transform_data function 
+    def test_extract_data_arrow_filters_malformed(self):
+        test_data = [
+            {"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click", "metadata": {"screen": "home"}},
+            {"user_id": "", "timestamp": "2025-01-01T11:00:00Z", "event_type": "click", "metadata": {"screen": "home"}},
+            {"user_id": "u3", "timestamp": "2025-01-01T12:00:00Z", "metadata": {"screen": "home"}}
+        ]
+        with open(self.temp_input_json, 'w') as f:
+            json.dump(test_data, f)
+
+        table = extract_data_arrow(self.temp_input_json)
+        self.assertEqual(table.num_rows, 1)
+        self.assertEqual(table['user_id'].to_pylist(), ['u1'])
+
+    def test_extract_data_non_list_json(self):
+        # a top-level object is not an event list; every iterated element is
+        # malformed and the result is an empty list, not a crash
+        with open(self.temp_input_json, 'w') as f:
+            json.dump({"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click"}, f)
+
+        extracted_events = extract_data(self.temp_input_json)
+        self.assertEqual(extracted_events, [])
+
+    def test_extract_data_threshold_falls_back_on_mixed_types(self):
+        import datapipeline
+        original_threshold = datapipeline.ARROW_VALIDATION_THRESHOLD
+        datapipeline.ARROW_VALIDATION_THRESHOLD = 2
+        self.addCleanup(setattr, datapipeline, 'ARROW_VALIDATION_THRESHOLD', original_threshold)
+
+        # the numeric user_id breaks Arrow's schema inference, so the large-batch
+        # path must fall back to the Python loop and keep the baseline behaviour
+        test_data = [
+            {"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click"},
+            {"user_id": 123, "timestamp": "2025-01-01T11:00:00Z", "event_type": "click"},
+            {"user_id": "u3", "timestamp": "2025-01-01T12:00:00Z", "event_type": "click"}
+        ]
+        with open(self.temp_input_json, 'w') as f:
+            json.dump(test_data, f)
+
+        extracted_events = extract_data(self.temp_input_json)
+        self.assertEqual(len(extracted_events), 3)
+
+    def test_extract_data_arrow_file_not_found(self):
+        table = extract_data_arrow(Path("non_existent_file.json"))
+        self.assertIsNone(table)
+
+    #  Test Cases for transform_data function
     def test_transform_data_basic_conversion(self):
         events = [
             {"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click", "metadata": {"screen": "home"}},
@@ -161,6 +195,49 @@ class TestDataPipeline(unittest.TestCase):
         self.assertEqual(df.loc[0, 'timestamp'], datetime(2025, 1, 1, 10, 0, 0, tzinfo=pd.Timestamp('2025-01-01 10:00:00+00:00').tz))
         self.assertEqual(df.loc[1, 'metadata_amount'], 10.50)
 
+    def test_transform_data_offset_timestamps(self):
+        # offset-suffixed feeds (like the shipped raw_events.json) take the
+        # single general-parser pass and still normalize to UTC
+        events = [
+            {"user_id": "u1", "timestamp": "2025-01-01T10:00:00-08:00", "event_type": "click", "metadata": {"screen": "home"}},
+            {"user_id": "u2", "timestamp": "2025-01-01T11:00:00+00:00", "event_type": "click", "metadata": {"screen": "home"}}
+        ]
+        df = transform_data(events)
+        self.assertEqual(len(df), 2)
+        self.assertEqual(df.loc[0, 'timestamp'], pd.Timestamp('2025-01-01 18:00:00+00:00'))
+        self.assertEqual(df.loc[1, 'timestamp'], pd.Timestamp('2025-01-01 11:00:00+00:00'))
+
+    def test_transform_data_non_dict_metadata(self):
+        # metadata is not a validated field, so a scalar value must not crash
+        # the flatten; it lands in a plain 'metadata' column like json_normalize
+        events = [
+            {"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click", "metadata": "oops"},
+            {"user_id": "u2", "timestamp": "2025-01-01T11:00:00Z", "event_type": "click", "metadata": {"screen": "home"}}
+        ]
+        df = transform_data(events)
+        self.assertEqual(len(df), 2)
+        self.assertIn('metadata', df.columns)
+        self.assertIn('metadata_screen', df.columns)
+        self.assertEqual(df.loc[0, 'metadata'], 'oops')
+        self.assertEqual(df.loc[1, 'metadata_screen'], 'home')
+
+    def test_transform_data_arrow_table_input(self):
+        test_data = [
+            {"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click", "metadata": {"screen": "home"}},
+            {"user_id": "u2", "timestamp": "2025-01-01T11:00:00Z", "event_type": "purchase", "metadata": {"amount": "10.50"}}
+        ]
+        with open(self.temp_input_json, 'w') as f:
+            json.dump(test_data, f)
+
+        table = extract_data_arrow(self.temp_input_json)
+        df = transform_data(table)
+        self.assertIsInstance(df, pd.DataFrame)
+        self.assertEqual(len(df), 2)
+        self.assertIn('metadata_screen', df.columns)
+        self.assertIn('metadata_amount', df.columns)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['timestamp']))
+        self.assertTrue(pd.api.types.is_float_dtype(df['metadata_amount']))
+
     def test_transform_data_empty_input(self):
         df = transform_data([])
         self.assertIsInstance(df, pd.DataFrame)
@@ -177,7 +254,18 @@ class TestDataPipeline(unittest.TestCase):
         self.assertEqual(df.loc[df.index[0], 'user_id'], 'u2')
         self.assertTrue(pd.isna(df.loc[df.index[0], 'metadata_amount']))
 
-    #  Test Cases for define_analytics function 
+    def test_transform_for_analytics_skips_metadata(self):
+        events = [
+            {"user_id": "u1", "timestamp": "2025-01-01T10:00:00Z", "event_type": "click", "metadata": {"screen": "home"}},
+            {"user_id": "u2", "timestamp": "invalid-date", "event_type": "purchase", "metadata": {"amount": "10.50"}}
+        ]
+        df = transform_for_analytics(events)
+        self.assertEqual(list(df.columns), ['user_id', 'timestamp', 'event_type'])
+        self.assertEqual(len(df), 1)
+        self.assertEqual(df.loc[df.index[0], 'user_id'], 'u1')
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df['timestamp']))
+
+    #  Test Cases for define_analytics function
     def test_define_analytics_basic(self):
         sample_df = pd.DataFrame([
             {'user_id': 'A', 'timestamp': datetime(2025, 3, 1, 10, 0, 0), 'event_type': 'click', 'metadata_screen': 'home'},
@@ -204,12 +292,35 @@ class TestDataPipeline(unittest.TestCase):
         self.assertEqual(most_active['user_id'].iloc[0], 'A')
         self.assertEqual(most_active['event_count'].iloc[0], 3)
 
+    def test_define_analytics_ignores_null_keys(self):
+        sample_df = pd.DataFrame([
+            {'user_id': 'A', 'timestamp': pd.Timestamp(2025, 3, 1, 10), 'event_type': 'click'},
+            {'user_id': None, 'timestamp': pd.Timestamp(2025, 3, 1, 11), 'event_type': 'click'},
+            {'user_id': 'B', 'timestamp': pd.NaT, 'event_type': 'view'},
+            {'user_id': 'A', 'timestamp': pd.Timestamp(2025, 3, 2, 9), 'event_type': 'view'},
+        ])
+
+        daily_counts, active_users, most_active = define_analytics(sample_df)
+
+        # The NaT row drops out of the daily counts; the null user still counts there
+        self.assertEqual(len(daily_counts), 2)
+        self.assertEqual(daily_counts.loc[(daily_counts['event_date'] == date(2025, 3, 1)) & (daily_counts['event_type'] == 'click'), 'event_count'].iloc[0], 2)
+        self.assertEqual(daily_counts.loc[(daily_counts['event_date'] == date(2025, 3, 2)) & (daily_counts['event_type'] == 'view'), 'event_count'].iloc[0], 1)
+
+        # The null user is not an active user; A and B are
+        self.assertEqual(active_users['total_active_users'].iloc[0], 2)
+
+        self.assertEqual(most_active['user_id'].iloc[0], 'A')
+        self.assertEqual(most_active['event_count'].iloc[0], 2)
+
     def test_define_analytics_empty_input(self):
         empty_df = pd.DataFrame()
         daily_counts, active_users, most_active = define_analytics(empty_df)
 
         self.assertTrue(daily_counts.empty)
-        self.assertEqual(active_users['total_active_users'].iloc[0], 0) 
+        # the empty default must carry the same schema as the populated result
+        self.assertEqual(list(daily_counts.columns), ['event_date', 'event_type', 'event_count'])
+        self.assertEqual(active_users['total_active_users'].iloc[0], 0)
         self.assertTrue(most_active.empty)
 
 